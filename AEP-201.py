@@ -7,11 +7,12 @@
 
 import os
 import re
+import asyncio
 import logging
 import datetime
 import secrets
 import string
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Tuple
 from functools import wraps
 
 import jwt
@@ -21,13 +22,14 @@ from pydantic import BaseModel, EmailStr, validator, constr
 from fastapi import FastAPI, HTTPException, Depends, status, Request, Header
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import create_engine, event, text, Column, Integer, String, Boolean, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from jose import JWTError
 from redis.exceptions import RedisError
-from email_validator import validate_email, EmailNotValidError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,17 +44,51 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 EMAIL_VERIFICATION_EXPIRE_HOURS = int(os.getenv("EMAIL_VERIFICATION_EXPIRE_HOURS", "24"))
 PASSWORD_RESET_EXPIRE_MINUTES = int(os.getenv("PASSWORD_RESET_EXPIRE_MINUTES", "30"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+
+# Character set for verification/reset tokens
+TOKEN_ALPHABET = string.ascii_letters + string.digits
 
 # Database setup
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
+if DATABASE_URL.startswith("sqlite"):
+    # SQLAlchemy 1.4 defaults file-backed SQLite to NullPool; keep connections open instead
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+
+    # Runs once per pooled connection, so the page cache and mmap stay warm
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.close()
+else:
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+    )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
 Base = declarative_base()
 
 # Redis setup
 redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
 
 # FastAPI app
-app = FastAPI(title="AEP Authentication Service", version="1.0.0")
+app = FastAPI(title="AEP Authentication Service", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -67,18 +103,17 @@ app.add_middleware(
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 # Password validation
+PASSWORD_PATTERNS = (
+    re.compile(r"[A-Z]"),
+    re.compile(r"[a-z]"),
+    re.compile(r"[0-9]"),
+    re.compile(r"[!@#$%^&*(),.?\":{}|<>]"),
+)
+
 def validate_password_strength(password: str) -> bool:
     if len(password) < 8:
         return False
-    if not re.search(r"[A-Z]", password):
-        return False
-    if not re.search(r"[a-z]", password):
-        return False
-    if not re.search(r"[0-9]", password):
-        return False
-    if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
-        return False
-    return True
+    return all(pattern.search(password) for pattern in PASSWORD_PATTERNS)
 
 # Database models
 class User(Base):
@@ -97,9 +132,9 @@ class UserSession(Base):
     __tablename__ = "user_sessions"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False, index=True)
     token = Column(String, unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 # Pydantic models
@@ -170,8 +205,9 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 def create_tokens(user_id: int, db: Session, redis_client: redis.Redis) -> Tuple[str, str]:
-    access_token_expires = datetime.datetime.utcnow() + datetime.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    refresh_token_expires = datetime.datetime.utcnow() + datetime.timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    now = datetime.datetime.utcnow()
+    access_token_expires = now + datetime.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    refresh_token_expires = now + datetime.timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     
     access_payload = {"sub": str(user_id), "type": "access", "exp": access_token_expires}
     refresh_payload = {"sub": str(user_id), "type": "refresh", "exp": refresh_token_expires}
@@ -200,7 +236,7 @@ def verify_token(token: str, token_type: str = "access") -> Optional[int]:
         return None
 
 def generate_random_token(length: int = 32) -> str:
-    return ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(length))
+    return ''.join(secrets.choice(TOKEN_ALPHABET) for _ in range(length))
 
 # Authentication dependencies
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
@@ -214,8 +250,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-    if user is None:
+    user = db.get(User, user_id)
+    if user is None or not user.is_active:
         raise credentials_exception
     
     return user
@@ -233,16 +269,17 @@ def rate_limit(requests_per_minute: int = 10):
             client_ip = request.client.host
             key = f"rate_limit:{func.__name__}:{client_ip}"
             
-            current = int(redis_client.get(key) or 0)
-            if current >= requests_per_minute:
+            # Start the 60s window on the first hit only; later hits just count
+            pipe = redis_client.pipeline()
+            pipe.set(key, 0, ex=60, nx=True)
+            pipe.incr(key)
+            _, current = pipe.execute()
+            if current > requests_per_minute:
                 raise HTTPException(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                     detail="Rate limit exceeded"
                 )
             
-            redis_client.incr(key)
-            redis_client.expire(key, 60)
-            
             return await func(request, *args, **kwargs)
         return wrapper
     return decorator
@@ -337,8 +374,8 @@ async def refresh_token(refresh_token: str = Header(...), db: Session = Depends(
         raise credentials_exception
     
     user_id = int(user_id)
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-    if not user:
+    user = db.get(User, user_id)
+    if not user or not user.is_active:
         raise credentials_exception
     
     # Verify JWT token
@@ -380,7 +417,7 @@ async def verify_email(request: EmailVerificationRequest, db: Session = Depends(
         )
     
     user_id = int(user_id)
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -429,27 +466,22 @@ async def reset_password(request: PasswordReset, db: Session = Depends(get_db),
         )
     
     user_id = int(user_id)
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+    user = db.get(User, user_id)
     
-    if not user:
+    if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User not found"
         )
     
-    # Update password
+    # Update password and remove all active sessions
     user.hashed_password = hash_password(request.new_password)
-    db.commit()
-    
-    # Remove all active sessions
+    session_tokens = [token for (token,) in db.query(UserSession.token).filter(UserSession.user_id == user_id)]
     db.query(UserSession).filter(UserSession.user_id == user_id).delete()
     db.commit()
     
-    # Clean up Redis keys
-    redis_client.delete(redis_key)
-    for key in redis_client.scan_iter(f"refresh_token:*"):
-        if redis_client.get(key) == user_id:
-            redis_client.delete(key)
+    # Clean up Redis keys for the reset token and the revoked refresh tokens
+    redis_client.delete(redis_key, *(f"refresh_token:{token}" for token in session_tokens))
     
     return {"message": "Password successfully reset"}
 
@@ -474,11 +506,13 @@ async def update_user_profile(update_data: UserBase, current_user: User = Depend
         )
 
 # Health check endpoint
+HEALTH_CHECK_QUERY = text("SELECT 1")
+
 @app.get("/health")
 async def health_check(db: Session = Depends(get_db), redis_client: redis.Redis = Depends(get_redis)):
     try:
         # Check database connection
-        db.execute("SELECT 1")
+        db.execute(HEALTH_CHECK_QUERY)
         
         # Check Redis connection
         redis_client.ping()
@@ -516,21 +550,11 @@ async def schedule_cleanup():
                 db.commit()
                 db.close()
                 
-                # Clean expired Redis tokens
-                for key in redis_client.scan_iter("email_verify:*"):
-                    if redis_client.ttl(key) == -2:
-                        redis_client.delete(key)
-                
-                for key in redis_client.scan_iter("password_reset:*"):
-                    if redis_client.ttl(key) == -2:
-                        redis_client.delete(key)
+                # Redis tokens are written with SETEX and expire on their own
                 
                 await asyncio.sleep(3600)  # Run every hour
             except Exception as e:
                 logger.error(f"Cleanup task failed: {str(e)}")
                 await asyncio.sleep(300)  # Retry after 5 minutes
     
-    asyncio.create_task(cleanup_task())
-
-# Import asyncio for cleanup task
-import asyncio
\ No newline at end of file
+    asyncio.create_task(cleanup_task())
\ No newline at end of file
@@ -13,15 +13,15 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import databases
 import sqlalchemy
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Table
+from sqlalchemy import create_engine, event, Column, Integer, String, ForeignKey, Table
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, Session
+from sqlalchemy.orm import sessionmaker, relationship, selectinload, Session
+from sqlalchemy.pool import QueuePool
 import os
+import hashlib
+import hmac
 from dotenv import load_dotenv
-import uuid
 from logging import getLogger
-from logging.config import dictConfig
-from log_config import LogConfig
 
 # Load environment variables
 load_dotenv()
@@ -30,24 +30,61 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
 
 logger = getLogger(__name__)
 
 database = databases.Database(DATABASE_URL)
 metadata = sqlalchemy.MetaData()
-engine = create_engine(DATABASE_URL)
+if DATABASE_URL.startswith("sqlite"):
+    # SQLAlchemy 1.4 defaults file-backed SQLite to NullPool; keep connections open instead
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+
+    # Runs once per pooled connection, so the page cache and mmap stay warm
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.close()
+else:
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+    )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 # Security
 security = HTTPBearer()
 
+# Default roles and their comma-separated permissions
+DEFAULT_ROLES = {
+    "employee": "view_dashboard,edit_profile",
+    "manager": "view_dashboard,edit_profile,manage_team,view_reports",
+    "admin": "view_dashboard,edit_profile,manage_team,view_reports,manage_users,manage_roles",
+}
+
 # Database Models
 user_role_association = Table(
     'user_role_association',
     Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('role_id', Integer, ForeignKey('roles.id'))
+    Column('user_id', Integer, ForeignKey('users.id'), index=True),
+    Column('role_id', Integer, ForeignKey('roles.id'), index=True)
 )
 
 class Role(Base):
@@ -90,17 +127,22 @@ class UserResponse(BaseModel):
     email: str
     roles: List[str]
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
 # Utility functions
+def _scrypt(password: str, salt: bytes) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=16384, r=8, p=1, dklen=32)
+
 def verify_password(plain_password, hashed_password):
-    # In production, use proper password hashing like bcrypt
-    return plain_password == hashed_password
+    # Stored as "<salt hex>$<derived key hex>"; compare in constant time
+    try:
+        salt_hex, key_hex = hashed_password.split("$", 1)
+        salt, stored = bytes.fromhex(salt_hex), bytes.fromhex(key_hex)
+    except (AttributeError, ValueError):
+        return False
+    return hmac.compare_digest(stored, _scrypt(plain_password, salt))
 
 def get_password_hash(password):
-    # In production, use proper password hashing
-    return password
+    salt = os.urandom(16)
+    return f"{salt.hex()}${_scrypt(password, salt).hex()}"
 
 def create_access_token(data: Dict[str, Any]):
     to_encode = data.copy()
@@ -126,7 +168,7 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = db.query(User).options(selectinload(User.roles)).filter(User.username == token_data.username).first()
     if user is None:
         raise credentials_exception
     return user
@@ -192,7 +234,7 @@ def register_user(app: FastAPI, db: Session = Depends(get_db)):
 def login(app: FastAPI, db: Session = Depends(get_db)):
     @app.post("/login")
     async def login(username: str, password: str, db: Session = Depends(get_db)):
-        user = db.query(User).filter(User.username == username).first()
+        user = db.query(User).options(selectinload(User.roles)).filter(User.username == username).first()
         if not user or not verify_password(password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -250,20 +292,18 @@ def startup(app: FastAPI):
     @app.on_event("startup")
     async def startup():
         await database.connect()
+        Base.metadata.create_all(bind=engine)
         # Create default roles if they don't exist
         db = SessionLocal()
         try:
-            default_roles = [
-                {"name": "employee", "permissions": "view_dashboard,edit_profile"},
-                {"name": "manager", "permissions": "view_dashboard,edit_profile,manage_team,view_reports"},
-                {"name": "admin", "permissions": "view_dashboard,edit_profile,manage_team,view_reports,manage_users,manage_roles"}
-            ]
-
-            for role_data in default_roles:
-                db_role = db.query(Role).filter(Role.name == role_data["name"]).first()
-                if not db_role:
-                    db_role = Role(name=role_data["name"], permissions=role_data["permissions"])
-                    db.add(db_role)
+            existing_roles = {
+                name for (name,) in db.query(Role.name).filter(Role.name.in_(DEFAULT_ROLES))
+            }
+            db.bulk_save_objects([
+                Role(name=name, permissions=permissions)
+                for name, permissions in DEFAULT_ROLES.items()
+                if name not in existing_roles
+            ])
 
             db.commit()
         finally: